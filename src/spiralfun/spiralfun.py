@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 from typing import Optional
+from PIL import Image, ImageDraw
 import math
 import imageio
-import io
+import numpy as np
 import tkinter as tki
 
 PointType = tuple[float, float]
@@ -11,35 +12,28 @@ CanvasPointType = tuple[int, int]
 
 STEP_SIZE = math.radians(1) * 0.05
 REDRAW_STEP = math.radians(1)
+REDRAW_EVERY = max(1, round(REDRAW_STEP / STEP_SIZE))
+
+# Circles only rotate by whole steps, so cos/sin are taken from tables indexed by step count
+STEPS_PER_TURN = round(math.pi * 2 / STEP_SIZE)
+COS_TABLE = [math.cos(n * STEP_SIZE) for n in range(STEPS_PER_TURN)]
+SIN_TABLE = [math.sin(n * STEP_SIZE) for n in range(STEPS_PER_TURN)]
 
 
 def calc_distance(point1: PointType, point2: PointType) -> float:
-    dx = point2[0] - point1[0]
-    dy = point2[1] - point1[1]
-    return math.sqrt(dx ** 2 + dy ** 2)
+    return math.hypot(point2[0] - point1[0], point2[1] - point1[1])
 
 
 def calc_angle(origin: PointType, point: PointType) -> float:
-    dy = point[1] - origin[1]
-    r = calc_distance(origin, point)
-
-    if dy > r:
-        dy = r
-    if dy < -r:
-        dy = -r
-
-    angle = math.asin(dy / r)
-
-    if point[0] > origin[0]:
-        return angle
-
-    return math.pi - angle
+    return math.atan2(point[1] - origin[1], point[0] - origin[0])
 
 
 class Circle:
+    __slots__ = ('__space', '__x', '__y', '__draw_pos', '__radius', '__draw', '__id', '__trail')
+
     def __init__(self, space: Space, center: PointType, radius: float) -> None:
         self.__space = space
-        self.__center = center
+        self.__x, self.__y = center
         self.__draw_pos = center
         self.__radius = radius
         self.__draw = False
@@ -50,9 +44,10 @@ class Circle:
         x2 = canvas_center[0] + radius
         y2 = canvas_center[1] + radius
         self.__id = canvas.create_oval(x1, y1, x2, y2, outline='lightgreen')
+        self.__trail: list[int] = list(canvas_center)
 
     def get_center(self) -> PointType:
-        return self.__center
+        return (self.__x, self.__y)
 
     def get_radius(self) -> float:
         return self.__radius
@@ -61,49 +56,66 @@ class Circle:
         self.__draw = draw
 
     def moveto(self, new_center: PointType) -> None:
+        self.__move(new_center[0], new_center[1])
+
+    def __move(self, x: float, y: float) -> None:
+        if self.__draw and math.hypot(x - self.__draw_pos[0], y - self.__draw_pos[1]) >= 1.0:
+            self.__draw_pos = (x, y)
+            self.__trail.extend(self.__space.space2canvas(self.__draw_pos))
+
+        self.__x = x
+        self.__y = y
+        self.__space.mark_changed()
+
+    def update_canvas(self) -> None:
         canvas = self.__space.get_canvas()
-        canvas_new_center = self.__space.space2canvas(new_center)
 
-        if self.__draw and calc_distance(self.__draw_pos, new_center) >= 1.0:
-            line_start = self.__space.space2canvas(self.__draw_pos)
-            canvas.create_line(line_start[0], line_start[1], canvas_new_center[0], canvas_new_center[1])
-            self.__draw_pos = new_center
+        # The trail holds the last drawn point followed by the points added since.
+        if len(self.__trail) > 2:
+            self.__space.draw_line(self.__trail)
+            del self.__trail[:-2]
 
-        self.__center = new_center
-        x = canvas_new_center[0] - self.__radius
-        y = canvas_new_center[1] - self.__radius
+        canvas_center = self.__space.space2canvas((self.__x, self.__y))
+        x = canvas_center[0] - self.__radius
+        y = canvas_center[1] - self.__radius
         canvas.moveto(self.__id, x, y)
 
-    def rotate(self, rotation_center: PointType, clockwise: bool = True):
-        angle = calc_angle(rotation_center, self.__center)
-        angle += -STEP_SIZE if clockwise else STEP_SIZE
-        d = calc_distance(rotation_center, self.__center)
-        x = math.cos(angle) * d + rotation_center[0]
-        y = math.sin(angle) * d + rotation_center[1]
-        self.moveto((x, y))
+    def rotate(self, rotation_center: PointType, step_delta: float = -STEP_SIZE):
+        self.rotate_with(math.cos(step_delta), math.sin(step_delta), rotation_center[0], rotation_center[1])
+
+    def rotate_with(self, c: float, s: float, rx: float, ry: float):
+        dx = self.__x - rx
+        dy = self.__y - ry
+        x = rx + c * dx - s * dy
+        y = ry + s * dx + c * dy
+        self.__move(x, y)
 
 
 class Space:
     def __init__(self, width: int, height: int) -> None:
         self.__movie_writer: Optional[imageio.core.format.Format.Writer] = None
-        self.__width = width
-        self.__height = height
+
+        # Bumped through mark_changed() whenever a circle is added or moved, to skip capturing unchanged movie frames
+        self.__epoch = 0
+        self.__movie_epoch = -1
+        self.__half_width = width / 2.0
+        self.__half_height = height / 2.0
         self.__canvas = tki.Canvas(width=width, height=height, bg='white')
         self.__canvas.pack(expand=tki.YES, fill=tki.BOTH)
+
+        # Offscreen copy of the lines drawn on the canvas for capturing movie frames
+        self.__image = Image.new('RGB', (width, height), 'white')
+        self.__image_draw = ImageDraw.Draw(self.__image)
         self.__circles: list[Circle] = []
 
     def get_canvas(self) -> tki.Canvas:
         return self.__canvas
 
     def space2canvas(self, point: PointType) -> CanvasPointType:
-        x = round(self.__width / 2.0 + point[0])
-        y = round(self.__height / 2.0 - point[1])
-        return (x, y)
+        return (round(self.__half_width + point[0]), round(self.__half_height - point[1]))
 
     def canvas2space(self, point: CanvasPointType) -> PointType:
-        x = point[0] - self.__width / 2.0
-        y = self.__height / 2.0 - point[1]
-        return (x, y)
+        return (point[0] - self.__half_width, self.__half_height - point[1])
 
     def add_circle(self, radius: float, draw_line: bool = False) -> None:
         if not self.__circles:
@@ -116,34 +128,58 @@ class Space:
 
         circle.set_draw(draw_line)
         self.__circles.append(circle)
+        self.mark_changed()
 
     def rotate_circle(self, index: int, nsteps: int) -> None:
         if index < 1 or index >= len(self.__circles):
             raise IndexError
 
-        rotation_center = self.__circles[index - 1].get_center()
-        clockwise = nsteps > 0
+        rx, ry = self.__circles[index - 1].get_center()
+        step = -nsteps % STEPS_PER_TURN
+        c = COS_TABLE[step]
+        s = SIN_TABLE[step]
+
+        for circle in self.__circles[index:]:
+            circle.rotate_with(c, s, rx, ry)
+
+    def mark_changed(self) -> None:
+        self.__epoch += 1
 
-        for i in range(index, len(self.__circles)):
-            circle = self.__circles[i]
+    def draw_line(self, coords: list[int]) -> None:
+        self.__canvas.create_line(*coords)
+        self.__image_draw.line(coords, fill='black')
 
-            for n in range(0, abs(nsteps)):
-                circle.rotate(rotation_center, clockwise)
+    def update_canvas(self) -> None:
+        for circle in self.__circles:
+            circle.update_canvas()
 
     def redraw(self) -> None:
+        self.update_canvas()
         self.__canvas.update()
 
     def save_image(self, file_name: str) -> None:
+        self.update_canvas()
         self.__canvas.postscript(file=file_name + '.ps')
 
     def add_movie_frame(self, file_name: str) -> None:
         if not self.__movie_writer:
             self.__movie_writer = imageio.get_writer(file_name + '.gif', mode='I')
 
-        ps = self.__canvas.postscript()
-        byte_stream = io.BytesIO(ps.encode('utf-8'))
-        image = imageio.imread(byte_stream)
-        self.__movie_writer.append_data(image)
+        if self.__epoch == self.__movie_epoch:
+            return
+
+        self.__movie_epoch = self.__epoch
+        self.update_canvas()
+        frame = self.__image.copy()
+        frame_draw = ImageDraw.Draw(frame)
+
+        for circle in self.__circles:
+            center = self.space2canvas(circle.get_center())
+            radius = circle.get_radius()
+            bbox = (center[0] - radius, center[1] - radius, center[0] + radius, center[1] + radius)
+            frame_draw.ellipse(bbox, outline='lightgreen')
+
+        self.__movie_writer.append_data(np.asarray(frame))
 
 
 def main() -> int:
@@ -156,20 +192,19 @@ def main() -> int:
     space.add_circle(5, draw_line=False)
     space.add_circle(1, draw_line=True)
 
-    redraw = 0.0
-    for r in range(0, int(math.pi * 2 / STEP_SIZE)):
+    for r in range(0, STEPS_PER_TURN):
         space.rotate_circle(1, 1)
         space.rotate_circle(2, -3)
         space.rotate_circle(3, 9)
         space.rotate_circle(4, -27)
         space.rotate_circle(5, 81)
         space.rotate_circle(6, -243)
-        redraw += STEP_SIZE
 
-        if redraw > REDRAW_STEP:
+        if r and r % REDRAW_EVERY == 0:
             space.redraw()
             # space.add_movie_frame('counterclock')
-            redraw = 0
+
+    space.update_canvas()
 
     # save last frame
     # space.add_movie_frame('counterclock')